@@ -1,88 +1,333 @@
 # app/infer.py
 import base64
-import io
 import numpy as np
-from PIL import Image
 import cv2
+import tensorflow as tf
 from tensorflow.keras.models import model_from_json
 import os
+import platform
+import threading
+import time
 
 # --- CONFIG: filenames (put these in your project root or adjust paths) ---
 MODEL_JSON = "emotiondectector.json"
 MODEL_WEIGHTS = "emotiondetector.h5"
+MODEL_TFLITE = "emotiondetector.tflite"   # converted from the Keras model on first use
+MODEL_ONNX = "emotiondetector.onnx"       # converted from the Keras model on first use
+MODEL_ONNX_INT8 = "emotiondetector.int8.onnx"  # optional, statically quantized offline; preferred when present
+FACE_DETECTOR_ONNX = "face_detection_yunet.onnx"  # optional YuNet model; Haar cascade is used when missing
 
-# --- Load Keras model (json + weights) ---
+# face detection runs on a copy downscaled to this width (Haar cost is ~O(pixels))
+DETECT_WIDTH = 320
+# temporal gating: reuse the previous result while the (64x48 thumbnail of the) frame
+# changes by less than GATE_DIFF mean gray levels, for at most GATE_MAX_AGE seconds
+GATE_DIFF = 2.0
+GATE_MAX_AGE = 1.0
+# ROI and CNN input buffers are preallocated for up to this many faces per frame
+MAX_FACES = 8
+
+# inference backend: "keras" (tf.function), "tflite" (XNNPACK CPU kernels) or "onnx" (ONNX Runtime)
+FACE_BACKEND = os.environ.get("FACE_BACKEND", "keras").lower()
+
+# Frames run concurrently in the server's thread pool (one per ~2 cores),
+# so keep each op to 2 threads rather than fanning out over every core;
+# the tiny graph has nothing to gain from running independent ops in parallel.
+# The same per-call budget applies to every backend (TF, TFLite, ONNX Runtime).
+_OP_THREADS = 2
+tf.config.threading.set_intra_op_parallelism_threads(_OP_THREADS)
+tf.config.threading.set_inter_op_parallelism_threads(1)
+# OpenCV's own thread pool would fan every resize/cascade out over all cores on top of
+# those workers; parallelism comes from the pool, so each frame's OpenCV work stays on
+# its calling thread. Process-global settings, applied once at import.
+cv2.setUseOptimized(True)
+cv2.setNumThreads(1)
+
+# Models are loaded lazily (first frame, or warmup() from the app's startup hook) so that
+# importing this module stays cheap. Everything below is filled in by _ensure_loaded().
 _model = None
-try:
-    if os.path.exists(MODEL_JSON):
-        with open(MODEL_JSON, "r", encoding="utf-8") as f:
-            _model = model_from_json(f.read())
-        if os.path.exists(MODEL_WEIGHTS):
-            _model.load_weights(MODEL_WEIGHTS)
+_infer = None
+_tflite = None
+_tflite_lock = threading.Lock()   # the TFLite interpreter is not thread-safe
+_ort = None
+_haar = None
+_yunet = None
+_yunet_lock = threading.Lock()   # setInputSize mutates the detector
+_loaded = False
+_load_lock = threading.Lock()
+
+def _load_keras_model():
+    """Load Keras model (json + weights); None when the files are missing or broken"""
+    model = None
+    try:
+        if os.path.exists(MODEL_JSON):
+            with open(MODEL_JSON, "r", encoding="utf-8") as f:
+                model = model_from_json(f.read())
+            if os.path.exists(MODEL_WEIGHTS):
+                model.load_weights(MODEL_WEIGHTS)
+            else:
+                print(f"[WARN] weights file not found: {MODEL_WEIGHTS}")
         else:
-            print(f"[WARN] weights file not found: {MODEL_WEIGHTS}")
-    else:
-        print(f"[WARN] model json not found: {MODEL_JSON}")
-except Exception as e:
-    print("Error loading model:", e)
-    _model = None
+            print(f"[WARN] model json not found: {MODEL_JSON}")
+    except Exception as e:
+        print("Error loading model:", e)
+        model = None
+    return model
+
+def _build_infer(model):
+    """
+    Single compiled graph for every batch size: one forward pass per frame.
+    XLA fuses the small conv+bias+relu chains into a few kernels.
+    """
+    @tf.function(input_signature=[tf.TensorSpec([None, 48, 48, 1], tf.float32)], jit_compile=True)
+    def infer(x):
+        return model(x, training=False)
+
+    # warm up so tracing + XLA compilation (per batch size) happen outside the request path
+    try:
+        infer(tf.zeros([1, 48, 48, 1], tf.float32))
+    except Exception as e:
+        print("XLA warmup failed, running without jit_compile:", e)
+        infer = tf.function(lambda x: model(x, training=False),
+                            input_signature=[tf.TensorSpec([None, 48, 48, 1], tf.float32)])
+    return infer
+
+def _convert_to_tflite(model) -> bytes:
+    """Post-training quantization: fp16 on x86 (int8 can be slower there), dynamic-range int8 on ARM"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if platform.machine().lower() not in ("aarch64", "arm64"):
+        converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
+def _build_tflite(model):
+    """Optional TFLite interpreter (XNNPACK delegate is on by default)"""
+    try:
+        if os.path.exists(MODEL_TFLITE):
+            with open(MODEL_TFLITE, "rb") as f:
+                tflite_bytes = f.read()
+        else:
+            tflite_bytes = _convert_to_tflite(model)
+            with open(MODEL_TFLITE, "wb") as f:
+                f.write(tflite_bytes)
+        interpreter = tf.lite.Interpreter(model_content=tflite_bytes, num_threads=_OP_THREADS)
+        interpreter.allocate_tensors()
+        return interpreter
+    except Exception as e:
+        print("Error building TFLite interpreter, using Keras:", e)
+        return None
 
-# Haar cascade (OpenCV path)
-_haar = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+def _build_ort(model):
+    """Optional ONNX Runtime session (fused Conv+BN+ReLU, MLAS GEMM, low per-call overhead)"""
+    try:
+        import onnxruntime as ort
+        if not os.path.exists(MODEL_ONNX_INT8) and not os.path.exists(MODEL_ONNX):
+            import tf2onnx
+            tf2onnx.convert.from_keras(
+                model, input_signature=[tf.TensorSpec([None, 48, 48, 1], tf.float32)],
+                opset=17, output_path=MODEL_ONNX)
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = _OP_THREADS
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(
+            MODEL_ONNX_INT8 if os.path.exists(MODEL_ONNX_INT8) else MODEL_ONNX,
+            sess_options=so, providers=["CPUExecutionProvider"])
+    except Exception as e:
+        print("Error building ONNX Runtime session, using Keras:", e)
+        return None
+
+def _build_yunet():
+    """YuNet DNN detector (single fused pass, much faster than Haar on CPU) when its model is available"""
+    if not (os.path.exists(FACE_DETECTOR_ONNX) and hasattr(cv2, "FaceDetectorYN")):
+        return None
+    try:
+        return cv2.FaceDetectorYN.create(FACE_DETECTOR_ONNX, "", (320, 240),
+                                         score_threshold=0.6, nms_threshold=0.3)
+    except Exception as e:
+        print("Error loading YuNet face detector, using Haar:", e)
+        return None
+
+def _ensure_loaded():
+    """Load the CNN backend and face detectors once, on first use (thread-safe)"""
+    global _model, _infer, _tflite, _ort, _haar, _yunet, _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        # Haar cascade (OpenCV path)
+        _haar = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        _yunet = _build_yunet()
+
+        _model = _load_keras_model()
+        if _model is not None:
+            if FACE_BACKEND == "onnx":
+                _ort = _build_ort(_model)
+            elif FACE_BACKEND == "tflite":
+                _tflite = _build_tflite(_model)
+            if _ort is None and _tflite is None:
+                _infer = _build_infer(_model)
+        _loaded = True
+
+def warmup():
+    """Load models now (e.g. from the app's startup hook) instead of on the first frame"""
+    _ensure_loaded()
+
+def _predict(x_in: np.ndarray) -> np.ndarray:
+    """Run the emotion CNN on a (N,48,48,1) batch with the configured backend"""
+    if _ort is not None:
+        return _ort.run(None, {_ort.get_inputs()[0].name: x_in})[0]
+    if _tflite is None:
+        return _infer(tf.constant(x_in)).numpy()
+    with _tflite_lock:
+        in_detail = _tflite.get_input_details()[0]
+        if tuple(in_detail["shape"]) != x_in.shape:
+            _tflite.resize_tensor_input(in_detail["index"], x_in.shape)
+            _tflite.allocate_tensors()
+        _tflite.set_tensor(in_detail["index"], x_in)
+        _tflite.invoke()
+        return _tflite.get_tensor(_tflite.get_output_details()[0]["index"]).copy()
+
+def _detect_faces(img: np.ndarray):
+    """Detect faces on a downscaled frame, return boxes in full-resolution coordinates"""
+    scale = min(1.0, DETECT_WIDTH / float(img.shape[1]))
+    small = img
+    if scale < 1.0:
+        small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if _yunet is not None:
+        with _yunet_lock:
+            _yunet.setInputSize((small.shape[1], small.shape[0]))
+            _, found = _yunet.detect(small)
+        found = found[:, :4] if found is not None else []
+    else:
+        found = _haar.detectMultiScale(small, scaleFactor=1.2, minNeighbors=5, minSize=(24, 24))
+    faces = []
+    height, width = img.shape[:2]
+    for (x, y, w, h) in found:
+        # YuNet boxes can extend past the frame edges
+        x0, y0 = max(0, int(x / scale)), max(0, int(y / scale))
+        x1, y1 = min(width, int((x + w) / scale)), min(height, int((y + h) / scale))
+        if x1 > x0 and y1 > y0:
+            faces.append((x0, y0, x1 - x0, y1 - y0))
+    return faces
 
 # Label mapping (match your realtimedetection.py)
 LABELS = {0: 'angry', 1: 'disgust', 2: 'fear', 3: 'happy', 4: 'neutral', 5: 'sad', 6: 'surprise'}
+# index -> label, built once instead of per face (also sent once per websocket connection)
+CLASSES = [LABELS[i] for i in range(len(LABELS))]
 
-def _b64_to_bgr(data_url: str):
-    """Convert dataURL to BGR numpy image (OpenCV format)"""
-    if "," in data_url:
-        b64 = data_url.split(",", 1)[1]
-    else:
-        b64 = data_url
-    img_bytes = base64.b64decode(b64)
-    img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-    arr = np.array(img)[:, :, ::-1]  # RGB->BGR
-    return arr
-
-def _extract_features(gray_roi: np.ndarray) -> np.ndarray:
-    """Resize/reshape/normalize as (1,48,48,1)"""
-    arr = np.array(gray_roi, dtype=np.float32).reshape(1, 48, 48, 1) / 255.0
-    return arr
-
-def predict_frame(data_url: str):
+def _decode_image(data):
+    """Decode a frame (raw JPEG bytes or a base64 dataURL) straight to a numpy image.
+    Grayscale for the Haar path (libjpeg decodes luma directly: no RGB buffer or cvtColor pass),
+    BGR when YuNet is active since it expects color input."""
+    if isinstance(data, str):
+        b64 = data.split(",", 1)[1] if "," in data else data
+        data = base64.b64decode(b64)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    img = cv2.imdecode(buf, cv2.IMREAD_COLOR if _yunet is not None else cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise ValueError("could not decode image frame")
+    return img
+
+_tls = threading.local()   # per-thread scratch buffers (frames may be processed concurrently)
+
+def _scratch(name: str, shape, dtype) -> np.ndarray:
+    """Persistent per-thread buffer, allocated on first use"""
+    buf = getattr(_tls, name, None)
+    if buf is None:
+        buf = np.empty(shape, dtype)
+        setattr(_tls, name, buf)
+    return buf
+
+def _gray_roi(img: np.ndarray, box, out: np.ndarray = None) -> np.ndarray:
+    """Crop a face box and resize to the 48x48 grayscale CNN input (converts only the crop).
+    Resizes straight into `out` when given."""
+    x, y, w, h = box
+    roi = img[y:y+h, x:x+w]
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    if out is None:
+        return cv2.resize(roi, (48, 48))
+    cv2.resize(roi, (48, 48), dst=out)
+    return out
+
+def _gray_rois(img: np.ndarray, faces) -> np.ndarray:
+    """(N,48,48) uint8 stack of face crops, written into the per-thread ROI buffer"""
+    n = len(faces)
+    if n > MAX_FACES:
+        return np.stack([_gray_roi(img, box) for box in faces])
+    rois = _scratch("roi_buf", (MAX_FACES, 48, 48), np.uint8)[:n]
+    for i, box in enumerate(faces):
+        _gray_roi(img, box, out=rois[i])
+    return rois
+
+def _extract_features(gray_rois: np.ndarray) -> np.ndarray:
+    """Normalize a (N,48,48) uint8 stack of crops into the (N,48,48,1) float32 CNN input.
+    Writes into a persistent per-thread buffer; the result is only valid until the next call."""
+    n = len(gray_rois)
+    buf = _scratch("batch_buf", (MAX_FACES, 48, 48, 1), np.float32)
+    out = buf[:n] if n <= MAX_FACES else np.empty((n, 48, 48, 1), np.float32)
+    np.multiply(gray_rois, 1.0 / 255.0, out=out[..., 0], dtype=np.float32)
+    return out
+
+def _thumbnail(img: np.ndarray) -> np.ndarray:
+    """64x48 grayscale thumbnail used to detect (near-)static frames"""
+    small = cv2.resize(img, (64, 48), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+def predict_frame(frame, include_probs: bool = True, include_classes: bool = True, gate: dict = None):
     """
-    Input: dataURL (e.g. 'data:image/jpeg;base64,...') representing a frame.
+    Input: raw JPEG bytes (binary websocket frame) or a dataURL (e.g. 'data:image/jpeg;base64,...').
     Output: dict { top_label: str, detections: [ { box: [x,y,w,h], label: str, probs: [...], classes: [...] } ] }
+    `probs` / `classes` are left out of each detection when include_probs / include_classes is False.
+    `gate` is an optional per-stream dict (e.g. one per websocket connection): when the frame is
+    nearly identical to the last one that was fully processed, that result is returned again and
+    face detection + CNN are skipped.
     """
     try:
-        frame = _b64_to_bgr(data_url)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = _haar.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5)
+        _ensure_loaded()
+        img = _decode_image(frame)
+        if gate is not None:
+            small = _thumbnail(img)
+            last_small = gate.get("small")
+            if (last_small is not None
+                    and gate.get("flags") == (include_probs, include_classes)
+                    and time.monotonic() - gate["time"] < GATE_MAX_AGE
+                    and cv2.absdiff(small, last_small).mean() < GATE_DIFF):
+                return dict(gate["result"])
+        faces = _detect_faces(img)
         detections = []
-        for (x, y, w, h) in faces:
-            roi = gray[y:y+h, x:x+w]
-            roi = cv2.resize(roi, (48, 48))
-            x_in = _extract_features(roi)
-            if _model is not None:
-                pred = _model.predict(x_in, verbose=0)[0]
+        preds = None
+        if len(faces) and _model is not None:
+            # batch every face of the frame into a single forward pass
+            rois = _gray_rois(img, faces)
+            x_in = _extract_features(rois)
+            preds = _predict(x_in)
+        for i, (x, y, w, h) in enumerate(faces):
+            if preds is not None:
+                pred = preds[i]
                 idx = int(np.argmax(pred))
-                label = LABELS.get(idx, str(idx))
-                probs = [float(p) for p in pred]
-                classes = [LABELS[i] for i in range(len(LABELS))]
+                label = CLASSES[idx]
+                probs = pred.tolist() if include_probs else None
             else:
                 # fallback: return neutral
                 label = "neutral"
                 probs = [0.0] * len(LABELS)
                 probs[list(LABELS.keys())[4]] = 1.0
-                classes = [LABELS[i] for i in range(len(LABELS))]
-            detections.append({
-                "box": [int(x), int(y), int(w), int(h)],
-                "label": label,
-                "probs": probs,
-                "classes": classes
-            })
+            det = {"box": [int(x), int(y), int(w), int(h)], "label": label}
+            if include_probs:
+                det["probs"] = probs
+            if include_classes:
+                det["classes"] = CLASSES
+            detections.append(det)
         top_label = detections[0]["label"] if detections else "no_face"
-        return {"top_label": top_label, "detections": detections}
+        result = {"top_label": top_label, "detections": detections}
+        if gate is not None:
+            gate.update(small=small, result=result, flags=(include_probs, include_classes),
+                        time=time.monotonic())
+            return dict(result)
+        return result
     except Exception as e:
         # On error return empty result (don't crash the websocket loop)
         print("infer.predict_frame error:", e)
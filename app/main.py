@@ -5,14 +5,22 @@ import base64
 import json
 import logging
 import asyncio
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+try:
+    import orjson   # Rust JSON: faster parse/serialize on the per-frame websocket path
+except ImportError:
+    orjson = None
+
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 
-from app.infer import predict_frame    # ensure this file exposes predict_frame
-from app.voice_infer import predict_emotion_from_wav_file  # returns same dict shape as before
+from app.infer import predict_frame, CLASSES, warmup as warmup_face_model    # ensure this file exposes predict_frame
+from app.voice_infer import predict_emotion_from_wav_file_async  # returns same dict shape as before
 
 from app.sensors import load_live_sensors, compute_wellness_from_sensors, load_all_sensor_data
 from app.wellness_engine import analyze_sleep, detect_sedentary, score_hrv, compute_burnout
@@ -20,6 +28,16 @@ from app.wellness_engine import analyze_sleep, detect_sedentary, score_hrv, comp
 
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+async def _send(ws: WebSocket, payload: dict):
+    """Serialize once and send; with orjson the UTF-8 bytes go out as-is (the client decodes them)"""
+    if orjson is not None:
+        await ws.send_bytes(orjson.dumps(payload))
+    else:
+        await ws.send_json(payload)
+
 app = FastAPI(title="Face+Voice Emotion Demo (stable)")
 
 app.add_middleware(
@@ -28,44 +46,111 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"],
 )
 
+# bounded pool for the CPU-bound face pipeline; TF/OpenCV release the GIL inside their kernels
+_predict_pool = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2),
+                                   thread_name_prefix="predict")
+
+
+@app.on_event("startup")
+def _load_face_model():
+    # load once before serving, so the first websocket frame doesn't pay for it
+    warmup_face_model()
+
+
+@app.on_event("shutdown")
+def _shutdown_predict_pool():
+    _predict_pool.shutdown(wait=False, cancel_futures=True)
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# landing page is read and encoded once at startup instead of on every GET /
+with open("static/index.html", "rb") as f:
+    _INDEX_HTML = f.read()
+# let browsers cache it and revalidate with a 304 instead of re-downloading
+_INDEX_HEADERS = {
+    "Cache-Control": "public, max-age=300",
+    "ETag": '"%s"' % hashlib.sha1(_INDEX_HTML).hexdigest(),
+}
+
 
 @app.get("/", response_class=HTMLResponse)
-def index():
-    with open("static/index.html", "r", encoding="utf-8") as f:
-        return f.read()
+def index(request: Request):
+    if request.headers.get("if-none-match") == _INDEX_HEADERS["ETag"]:
+        return Response(status_code=304, headers=_INDEX_HEADERS)
+    return HTMLResponse(_INDEX_HTML, headers=_INDEX_HEADERS)
+
+async def _send_video_result(ws: WebSocket, frame, with_probs: bool, gate: dict):
+    # Run CNN + OpenCV in the bounded pool so receiving (and other connections) keep going.
+    # Class names went out once in the "meta" message; probs only when the client opted in.
+    try:
+        res = await asyncio.get_running_loop().run_in_executor(
+            _predict_pool,
+            functools.partial(predict_frame, frame, include_probs=with_probs, include_classes=False,
+                              gate=gate))
+        res["type"] = "video"
+        await _send(ws, res)
+    except Exception as e:
+        logger.exception("Error during video predict")
+        await _send(ws, {"type":"video", "top_label":"error", "detections":[]})
+
+async def _video_worker(ws: WebSocket, pending: dict, wake: asyncio.Event):
+    """Process only the newest queued frame: frames that arrive while one is being
+    predicted overwrite each other, so latency stays bounded instead of backing up."""
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+            job = pending.pop("frame", None)
+            if job is not None:
+                await _send_video_result(ws, *job)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        # socket gone mid-send; the receive loop handles the disconnect
+        logger.debug("video worker stopped", exc_info=True)
 
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
     logger.info("WebSocket connected")
+    # per-frame probabilities are opt-in: ws://host/ws?probs=1 (or "probs": true in a JSON envelope)
+    with_probs = ws.query_params.get("probs") in ("1", "true")
+    # latest-frame-wins slot shared with the per-connection video worker
+    pending = {}
+    # last fully processed frame; near-identical frames reuse its result
+    gate = {}
+    wake = asyncio.Event()
+    worker = asyncio.create_task(_video_worker(ws, pending, wake))
     try:
+        await _send(ws, {"type":"meta", "classes":CLASSES})
         while True:
-            text = await ws.receive_text()
-            # Expect JSON envelope
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(msg.get("code", 1000))
+
+            # --- Video frames (fast): raw JPEG bytes, no base64/JSON envelope ---
+            if msg.get("bytes") is not None:
+                pending["frame"] = (msg["bytes"], with_probs, gate)
+                wake.set()
+                continue
+
+            # Control/audio messages: expect JSON envelope
             try:
-                obj = json.loads(text)
+                obj = _json_loads(msg.get("text") or "")
             except Exception:
                 # if not JSON, ignore
-                await ws.send_json({"type":"error", "message":"invalid json"})
+                await _send(ws, {"type":"error", "message":"invalid json"})
                 continue
 
             typ = obj.get("type", "video")
-            # --- Video frames (fast) ---
+            # --- Video frames as JSON dataURL envelope (older clients) ---
             if typ == "video":
                 data = obj.get("data")
                 if not data:
-                    await ws.send_json({"type":"error", "message":"no frame data"})
+                    await _send(ws, {"type":"error", "message":"no frame data"})
                     continue
-                # Predict synchronously (should be fast). If heavy, consider using to_thread too.
-                try:
-                    res = predict_frame(data)
-                    res["type"] = "video"
-                    await ws.send_json(res)
-                except Exception as e:
-                    logger.exception("Error during video predict")
-                    await ws.send_json({"type":"video", "top_label":"error", "detections":[]})
+                pending["frame"] = (data, bool(obj.get("probs", with_probs)), gate)
+                wake.set()
 
             # --- Audio analyze (only on user 'Analyze' press) ---
             elif typ == "audio":
@@ -73,15 +158,15 @@ async def websocket_endpoint(ws: WebSocket):
                 data = obj.get("data")
                 fmt = obj.get("format", "wav")
                 if action != "analyze":
-                    await ws.send_json({"type":"audio", "message":"unsupported action"})
+                    await _send(ws, {"type":"audio", "message":"unsupported action"})
                     continue
                 if not data:
-                    await ws.send_json({"type":"audio", "error":"no audio data"})
+                    await _send(ws, {"type":"audio", "error":"no audio data"})
                     continue
 
                 # We only support wav format (no ffmpeg). If not wav, return helpful error.
                 if fmt != "wav":
-                    await ws.send_json({"type":"audio", "error": "server expects WAV format. Please record/send WAV."})
+                    await _send(ws, {"type":"audio", "error": "server expects WAV format. Please record/send WAV."})
                     continue
 
                 # decode and save to temporary file
@@ -90,7 +175,7 @@ async def websocket_endpoint(ws: WebSocket):
                     audio_bytes = base64.b64decode(b64)
                 except Exception as e:
                     logger.exception("Failed to decode base64 audio")
-                    await ws.send_json({"type":"audio", "error":"failed to decode audio base64"})
+                    await _send(ws, {"type":"audio", "error":"failed to decode audio base64"})
                     continue
 
                 tmp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
@@ -104,9 +189,9 @@ async def websocket_endpoint(ws: WebSocket):
                     except:
                         pass
 
-                # Run the (potentially slow) audio model in a thread to avoid blocking the event loop
+                # Preprocessing runs in a thread; concurrent clips share one batched forward pass
                 try:
-                    predict_res = await asyncio.to_thread(predict_emotion_from_wav_file, tmp_wav.name)
+                    predict_res = await predict_emotion_from_wav_file_async(tmp_wav.name)
                 except Exception:
                     logger.exception("Audio prediction failed")
                     predict_res = {"error": "audio prediction failed"}
@@ -122,14 +207,16 @@ async def websocket_endpoint(ws: WebSocket):
                     predict_res["type"] = "audio"
                 else:
                     predict_res = {"type":"audio", "error":"invalid model response"}
-                await ws.send_json(predict_res)
+                await _send(ws, predict_res)
 
             else:
-                await ws.send_json({"type":"error", "message":"unknown message type"})
+                await _send(ws, {"type":"error", "message":"unknown message type"})
     except WebSocketDisconnect:
         logger.info("Websocket disconnected")
     except Exception:
         logger.exception("Unexpected websocket error")
+    finally:
+        worker.cancel()
 @app.get("/sensors")
 def get_sensors():
     """
@@ -234,11 +321,14 @@ def wellness_complete():
     latest_sensor = load_live_sensors()
     buzzer_status = latest_sensor.get("buzzer", 0) if latest_sensor else 0
     
+    # compute_burnout already runs the three component analyses; reuse them instead of repeating each one
+    burnout = compute_burnout(sensor_data)
+    components = burnout.get("component_analyses", {})
     return {
-        "sleep": analyze_sleep(sensor_data),
-        "sedentary": detect_sedentary(sensor_data),
-        "stress": score_hrv(sensor_data),
-        "burnout": compute_burnout(sensor_data),
+        "sleep": components.get("sleep"),
+        "sedentary": components.get("sedentary"),
+        "stress": components.get("stress_hrv"),
+        "burnout": burnout,
         "buzzer": buzzer_status
     }
 
@@ -261,12 +351,14 @@ def wellness_demo():
     with open(demo_file, 'r') as f:
         demo_data = json.load(f)
     
+    burnout = compute_burnout(demo_data)
+    components = burnout.get("component_analyses", {})
     return {
         "message": "Demo data - simulated 24-hour sleep cycle",
         "data_points": len(demo_data),
-        "sleep": analyze_sleep(demo_data),
-        "sedentary": detect_sedentary(demo_data),
-        "stress": score_hrv(demo_data),
-        "burnout": compute_burnout(demo_data),
+        "sleep": components.get("sleep"),
+        "sedentary": components.get("sedentary"),
+        "stress": components.get("stress_hrv"),
+        "burnout": burnout,
         "sample_readings": demo_data[:3] + demo_data[-3:]  # First 3 and last 3 readings
     }
@@ -1,47 +1,185 @@
 # app/sensors.py
 import os
 import json
+import bisect
 import logging
+import threading
 from typing import Dict, Any, Optional
 
+import numpy as np
+
+try:
+    from numba import njit   # compiles the scalar wellness kernel to native code
+except ImportError:
+    def njit(*args, **kwargs):
+        """numba not installed: run the kernel as plain Python (same results)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+try:
+    import orjson   # several times faster than the stdlib parser on telemetry logs
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 # Path to the JSON file (adjust if your file is elsewhere)
 SENSOR_JSON_PATH = os.path.join(os.getcwd(), "sensor_data.json")
 
-def load_all_sensor_data() -> list:
+# Parsed sensor_data.json, reused while the file's (st_mtime_ns, st_size) key is unchanged.
+# "records" feeds load_all_sensor_data, "last" feeds load_live_sensors.
+# Swapped as a whole, so readers always see one consistent parse.
+_CACHE = {"key": None, "records": [], "last": None}
+_CACHE_LOCK = threading.Lock()   # endpoints run in FastAPI's thread pool
+# Normalized live reading for the file version in "key"
+_LIVE = {"key": None, "live": None}
+
+# load_live_sensors only reads this many bytes from the end of a JSON-lines log
+TAIL_BYTES = 65536
+
+def _from_document(parsed):
+    """(records, last) for a whole-file JSON value: array -> itself, object -> [object], else empty"""
+    if isinstance(parsed, list):
+        return parsed, (parsed[-1] if parsed else None)
+    if isinstance(parsed, dict):
+        # single object, wrap in list
+        return [parsed], parsed
+    return [], None
+
+def _first_byte(f) -> bytes:
+    """First non-whitespace byte of an open binary file (b"" when it is blank), rewound to the start."""
+    while True:
+        chunk = f.read(4096)
+        if not chunk:
+            break
+        chunk = chunk.lstrip()
+        if chunk:
+            f.seek(0)
+            return chunk[:1]
+    f.seek(0)
+    return b""
+
+def _parse_sensor_file(path: str):
     """
-    Load all sensor records from sensor_data.json.
-    Returns list of all sensor readings for historical analysis.
+    Parse the sensor log into (records, last_record).
+    JSON-lines logs (what getData.py appends) are parsed line by line straight from the
+    file, without materializing the whole content and its splitlines() copy first.
+    JSON arrays, pretty-printed objects and malformed logs go through the whole-file path.
     """
+    with open(path, "rb") as f:
+        first = _first_byte(f)
+        if not first:
+            return [], None
+        if first != b"[":
+            try:
+                records = [_json_loads(line) for line in f if line.strip()]
+                if len(records) == 1:
+                    # a one-line file is also a valid whole-file document
+                    return _from_document(records[0])
+                return records, (records[-1] if records else None)
+            except Exception:
+                f.seek(0)
+        content = f.read().strip()
+
+    if not content:
+        return [], None
+    # Try parse as JSON array
     try:
-        if not os.path.exists(SENSOR_JSON_PATH):
-            return []
+        return _from_document(_json_loads(content))
+    except Exception:
+        # Fallback to JSON-lines
+        lines = [l.strip() for l in content.splitlines() if l.strip()]
+        try:
+            records = [_json_loads(line) for line in lines]
+        except Exception as e:
+            logger.exception("load_all_sensor_data error: %s", e)
+            records = []
+        # the live reading only needs the last line to be valid
+        last = _json_loads(lines[-1]) if lines else None
+        return records, last
 
-        with open(SENSOR_JSON_PATH, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            if not content:
-                return []
+def _file_key():
+    """(st_mtime_ns, st_size) of the sensor file, None when it doesn't exist"""
+    try:
+        st = os.stat(SENSOR_JSON_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
-        # Try parse as JSON array
-        try:
-            parsed = json.loads(content)
-            if isinstance(parsed, list):
-                return parsed
-            elif isinstance(parsed, dict):
-                # single object, wrap in list
-                return [parsed]
-            else:
-                return []
-        except Exception:
-            # Fallback to JSON-lines
-            lines = [l.strip() for l in content.splitlines() if l.strip()]
-            return [json.loads(line) for line in lines]
+_NEED_FULL_PARSE = object()
 
+def _tail_last_record(path: str):
+    """
+    Last record of a JSON-lines log, read from the final TAIL_BYTES of the file only
+    (O(64KB) per poll instead of O(file size)). Returns _NEED_FULL_PARSE for JSON arrays,
+    pretty-printed documents or anything else the tail alone can't answer.
+    """
+    with open(path, "rb") as f:
+        first = _first_byte(f)
+        if not first:
+            return None
+        if first == b"[":
+            return _NEED_FULL_PARSE
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - TAIL_BYTES)
+        f.seek(start)
+        tail = f.read()
+    lines = tail.splitlines()
+    if start > 0:
+        lines = lines[1:]   # first line of the window may be cut off
+    for line in reversed(lines):
+        if line.strip():
+            try:
+                return _json_loads(line)
+            except Exception:
+                return _NEED_FULL_PARSE
+    return None if start == 0 else _NEED_FULL_PARSE
+
+def _read_sensor_file() -> Dict[str, Any]:
+    """
+    Parse sensor_data.json (JSON array, single object or JSON-lines) into the cache,
+    skipping the read/parse entirely when the file hasn't changed since the last call.
+    """
+    global _CACHE
+    key = _file_key()
+    if key is None:
+        return {"key": None, "records": [], "last": None}
+    cache = _CACHE
+    if cache["key"] == key:
+        return cache
+
+    with _CACHE_LOCK:
+        if _CACHE["key"] != key:
+            records, last = _parse_sensor_file(SENSOR_JSON_PATH)
+            _CACHE = {"key": key, "records": records, "last": last}
+        return _CACHE
+
+def load_all_sensor_data() -> list:
+    """
+    Load all sensor records from sensor_data.json.
+    Returns list of all sensor readings for historical analysis.
+    The list is shared with later calls until the file changes; treat it as read-only.
+    """
+    try:
+        return _read_sensor_file()["records"]
     except Exception as e:
         logger.exception("load_all_sensor_data error: %s", e)
         return []
 
+def _normalize_scored(record: Dict[str, Any]):
+    """Map/normalize keys (handle different naming) -> (heart_rate, temperature, lux), the scored fields"""
+    heart_rate = float(record.get("HR", record.get("heartRate", record.get("heart_rate", 0))))
+    temperature = float(record.get("Temp", record.get("temperature", record.get("temp", record.get("tempC", 0)))))
+    lux = float(record.get("Lux", record.get("lux", record.get("light", 0))))
+    return heart_rate, temperature, lux
+
+def _normalize_reading(record: Dict[str, Any]):
+    """Map/normalize keys (handle different naming) -> (heart_rate, temperature, lux, buzzer)"""
+    buzzer = int(record.get("buzzer", record.get("Buzzer", 0)))
+    return _normalize_scored(record) + (buzzer,)
+
 def load_live_sensors() -> Dict[str, Any]:
     """
     Read the last sensor record from sensor_data.json.
@@ -50,83 +188,75 @@ def load_live_sensors() -> Dict[str, Any]:
       - JSON-lines (one JSON per line) -> returns last non-empty line
     Returns dict with keys: heart_rate, temperature, lux
     """
+    global _LIVE
     try:
-        if not os.path.exists(SENSOR_JSON_PATH):
+        key = _file_key()
+        if key is None:
             return {}
+        live_cache = _LIVE
+        if live_cache["key"] == key:
+            return live_cache["live"]
 
-        with open(SENSOR_JSON_PATH, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            if not content:
-                return {}
-
-        # Try parse as JSON array
-        try:
-            parsed = json.loads(content)
-            if isinstance(parsed, list) and len(parsed) > 0:
-                last = parsed[-1]
-            elif isinstance(parsed, dict):
-                # single object
-                last = parsed
-            else:
-                last = None
-        except Exception:
-            # Fallback to JSON-lines: pick last non-empty line
-            lines = [l.strip() for l in content.splitlines() if l.strip()]
-            if not lines:
-                return {}
-            last = json.loads(lines[-1])
+        cache = _CACHE
+        if cache["key"] == key:
+            last = cache["last"]
+        else:
+            # file changed (e.g. getData.py appended a line): only the tail is needed
+            last = _tail_last_record(SENSOR_JSON_PATH)
+            if last is _NEED_FULL_PARSE:
+                last = _read_sensor_file()["last"]
 
         if not last:
             return {}
 
-        # Map/normalize keys (handle different naming)
-        heart_rate = float(last.get("HR", last.get("heartRate", last.get("heart_rate", 0))))
-        temperature = float(last.get("Temp", last.get("temperature", last.get("temp", last.get("tempC", 0)))))
-        lux = float(last.get("Lux", last.get("lux", last.get("light", 0))))
-        buzzer = int(last.get("buzzer", last.get("Buzzer", 0)))
+        heart_rate, temperature, lux, buzzer = _normalize_reading(last)
 
-        return {
+        live = {
             "heart_rate": heart_rate,
             "temperature": temperature,
             "lux": lux,
             "buzzer": buzzer,
             "raw": last
         }
+        _LIVE = {"key": key, "live": live}
+        return live
 
     except Exception as e:
         logger.exception("load_live_sensors error: %s", e)
         return {}
 
-def compute_wellness_from_sensors(heart_rate: float, temperature: float, lux: float) -> Dict[str, Any]:
+# status bands: < 40 poor, [40, 60) moderate, [60, 80) good, >= 80 excellent
+_STATUS_THRESHOLDS = (40, 60, 80)
+_STATUS = ("poor", "moderate", "good", "excellent")
+_STATUS_ARR = np.array(_STATUS)
+
+# explicit signature: compiled eagerly at import, so the first /wellness request doesn't pay the JIT
+@njit("UniTuple(f8, 3)(f8, f8, f8)", cache=True)
+def _wellness_kernel(hr: float, temperature: float, lux: float):
     """
-    Compute a wellness score (0-100) based on heart rate, temperature (C), and lux.
-    soundDB has been removed from wellness calculations.
-    Returns: {score:float, status:str, breakdown: {...}}
-    Tunable logic:
-      - heart_rate: ideal 60-100 bpm -> full points; below/above penalized
-      - temperature (C): ideal 20-26C for environment
-      - lux: low light (<50) slightly penalized, good indoor 100-500, too bright >1000 penalized
+    Numeric core of compute_wellness_from_sensors: (hr_score, temp_score, lux_score), unrounded.
+    Pure float arithmetic so numba can compile it (cache=True keeps the compiled
+    artifact across restarts); fastmath stays off so results match the Python path.
+    Clamps are written as conditionals rather than max()/min() builtin calls, which
+    is cheaper when numba is not installed and keeps max(0.0, x)'s NaN -> 0.0.
     """
-    score = 100.0
-    breakdown = {}
-
     # HEART RATE (weight 40%)
     hr_score = 50.0  # base out of 100 for HR subscore then weighted
-    if heart_rate <= 0:
+    if hr <= 0:
         hr_score = 20.0
     else:
         # ideal range 60-100
-        if 60 <= heart_rate <= 100:
+        if 60 <= hr <= 100:
             hr_score = 100.0
         else:
             # penalize proportionally the further from range
-            if heart_rate < 60:
-                diff = 60 - heart_rate
+            if hr < 60:
+                diff = 60 - hr
             else:
-                diff = heart_rate - 100
+                diff = hr - 100
             # simple decay: larger diff -> lower score
-            hr_score = max(0.0, 100.0 - diff * 2.0)  # 2 points per bpm outside
-    breakdown["heart_rate_subscore"] = round(hr_score, 2)
+            hr_score = 100.0 - diff * 2.0  # 2 points per bpm outside
+            hr_score = hr_score if hr_score > 0.0 else 0.0
 
     # TEMPERATURE (weight 40%) - environmental temperature
     temp_score = 50.0
@@ -139,8 +269,8 @@ def compute_wellness_from_sensors(heart_rate: float, temperature: float, lux: fl
             diff = 20 - temperature
         else:
             diff = temperature - 26
-        temp_score = max(0.0, 100.0 - diff * 10.0)
-    breakdown["temperature_subscore"] = round(temp_score, 2)
+        temp_score = 100.0 - diff * 10.0
+        temp_score = temp_score if temp_score > 0.0 else 0.0
 
     # LUX (weight 20%)
     # prefer moderate indoor light: 100 - 1000 lux
@@ -152,11 +282,29 @@ def compute_wellness_from_sensors(heart_rate: float, temperature: float, lux: fl
         # outside preferred range penalize
         if lux < 100:
             # too dark
-            lux_score = max(0.0, 100.0 - (100 - lux) * 0.2)  # small penalty per lux below 100
+            lux_score = 100.0 - (100 - lux) * 0.2  # small penalty per lux below 100
         else:
             # too bright
-            lux_score = max(0.0, 100.0 - (lux - 1000) * 0.02)  # mild penalty
-    breakdown["lux_subscore"] = round(lux_score, 2)
+            lux_score = 100.0 - (lux - 1000) * 0.02  # mild penalty
+        lux_score = lux_score if lux_score > 0.0 else 0.0
+    return hr_score, temp_score, lux_score
+
+def compute_wellness_from_sensors(heart_rate: float, temperature: float, lux: float) -> Dict[str, Any]:
+    """
+    Compute a wellness score (0-100) based on heart rate, temperature (C), and lux.
+    soundDB has been removed from wellness calculations.
+    Returns: {score:float, status:str, breakdown: {...}}
+    Tunable logic:
+      - heart_rate: ideal 60-100 bpm -> full points; below/above penalized
+      - temperature (C): ideal 20-26C for environment
+      - lux: low light (<50) slightly penalized, good indoor 100-500, too bright >1000 penalized
+    """
+    hr_score, temp_score, lux_score = _wellness_kernel(float(heart_rate), float(temperature), float(lux))
+    breakdown = {
+        "heart_rate_subscore": round(hr_score, 2),
+        "temperature_subscore": round(temp_score, 2),
+        "lux_subscore": round(lux_score, 2),
+    }
 
     # combine with weights
     # weights: HR 40%, Temp 40%, Lux 20% (sum 100)
@@ -164,18 +312,81 @@ def compute_wellness_from_sensors(heart_rate: float, temperature: float, lux: fl
              breakdown["temperature_subscore"] * 0.40 +
              breakdown["lux_subscore"] * 0.20)
 
-    total = max(0.0, min(100.0, total))
-    if total >= 80:
-        status = "excellent"
-    elif total >= 60:
-        status = "good"
-    elif total >= 40:
-        status = "moderate"
-    else:
-        status = "poor"
+    total = total if total < 100.0 else 100.0
+    total = total if total > 0.0 else 0.0
+    status = _STATUS[bisect.bisect_right(_STATUS_THRESHOLDS, total)]
 
     return {
         "score": round(total, 2),
         "status": status,
         "breakdown": breakdown
     }
+
+# weights: HR 40%, Temp 40%, Lux 20% (sum 100)
+_WELLNESS_WEIGHTS = np.array([0.40, 0.40, 0.20])
+
+def compute_wellness_arr(heart_rate, temperature, lux) -> Dict[str, np.ndarray]:
+    """
+    Vectorized compute_wellness_from_sensors for scoring many samples in one pass
+    (e.g. a day of history for charts). Takes equal-length arrays (or scalars) and
+    applies the same tunable logic with np.where/np.maximum instead of Python branches.
+    Returns: {score: ndarray, status: ndarray[str], breakdown: {heart_rate_subscore, temperature_subscore, lux_subscore}}
+    Single readings should keep using compute_wellness_from_sensors; the array
+    overhead only pays off for batches.
+    """
+    hr = np.asarray(heart_rate, dtype=np.float64)
+    temp = np.asarray(temperature, dtype=np.float64)
+    lux = np.asarray(lux, dtype=np.float64)
+
+    # NaN fails every range test in the scalar kernel and clamps to 0.0; match that first
+    # HEART RATE: 100 inside 60-100 bpm, -2 per bpm outside, 20 when no reading
+    hr_score = np.select(
+        [np.isnan(hr), hr <= 0, hr < 60, hr > 100],
+        [0.0, 20.0, np.maximum(0.0, 100.0 - (60 - hr) * 2.0), np.maximum(0.0, 100.0 - (hr - 100) * 2.0)],
+        default=100.0)
+
+    # TEMPERATURE: 100 inside 20-26 C, -10 per degree outside
+    temp_score = np.select(
+        [np.isnan(temp), temp < 20, temp > 26],
+        [0.0, np.maximum(0.0, 100.0 - (20 - temp) * 10.0), np.maximum(0.0, 100.0 - (temp - 26) * 10.0)],
+        default=100.0)
+
+    # LUX: 100 inside 100-1000, mild penalties when too dark / too bright, 40 when no reading
+    lux_score = np.select(
+        [np.isnan(lux), lux <= 0, lux < 100, lux > 1000],
+        [0.0, 40.0, np.maximum(0.0, 100.0 - (100 - lux) * 0.2), np.maximum(0.0, 100.0 - (lux - 1000) * 0.02)],
+        default=100.0)
+
+    # subscores are rounded before weighting, as in the scalar version;
+    # stacked as (N,3) so the weighted sum is a single matrix-vector product
+    subscores = np.round(np.stack([hr_score, temp_score, lux_score], axis=-1), 2)
+    breakdown = {
+        "heart_rate_subscore": subscores[..., 0],
+        "temperature_subscore": subscores[..., 1],
+        "lux_subscore": subscores[..., 2],
+    }
+    total = np.clip(subscores @ _WELLNESS_WEIGHTS, 0.0, 100.0)
+    # side="right" puts a total equal to a threshold in the upper band, like bisect_right
+    status = _STATUS_ARR[np.searchsorted(_STATUS_THRESHOLDS, total, side="right")]
+
+    return {
+        "score": np.round(total, 2),
+        "status": status,
+        "breakdown": breakdown
+    }
+
+def compute_wellness_batch(records: list) -> Dict[str, Any]:
+    """
+    Score a list of raw sensor records (e.g. load_all_sensor_data()) in one vectorized pass.
+    Field names are normalized like load_live_sensors; returns compute_wellness_arr's result.
+    """
+    if not records:
+        empty = np.empty(0)
+        return {"score": empty, "status": _STATUS_ARR[:0],
+                "breakdown": {"heart_rate_subscore": empty,
+                              "temperature_subscore": empty,
+                              "lux_subscore": empty}}
+    # buzzer isn't scored, so a malformed one must not fail the batch
+    hr, temp, lux = (np.asarray(col, dtype=np.float64)
+                     for col in zip(*(_normalize_scored(r) for r in records)))
+    return compute_wellness_arr(hr, temp, lux)
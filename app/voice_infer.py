@@ -5,22 +5,69 @@ import base64
 import traceback
 import logging
 import random
+import threading
+import asyncio
+
+# one request's GEMMs get half the cores; the other half is left to the face pipeline.
+# OMP reads this only at library load, so it has to be set before torch is imported.
+_TORCH_THREADS = max(1, (os.cpu_count() or 2) // 2)
+os.environ.setdefault("OMP_NUM_THREADS", str(_TORCH_THREADS))
 
 import torch
 import numpy as np
 from transformers import AutoModelForAudioClassification, AutoFeatureExtractor
-import librosa
-  # needs ffmpeg on system
+# librosa (scipy, numba, soxr, ...) is imported only when a clip needs resampling
+# or soundfile is missing; 16 kHz WAVs never load it
+try:
+    import soundfile as sf   # libsndfile: decodes WAV straight to float32 in C
+except ImportError:
+    sf = None
 
 logger = logging.getLogger(__name__)
 
+torch.set_num_threads(_TORCH_THREADS)
+try:
+    torch.set_num_interop_threads(1)
+except RuntimeError:
+    pass   # already fixed if something else ran parallel work first
+# grad mode is per-thread: this covers import-time warmup, _forward still enters inference_mode
+torch.set_grad_enabled(False)
+torch.backends.cudnn.benchmark = True   # input shape is fixed, so the autotuned conv algo is reused
+
 MODEL_ID = "firdhokk/speech-emotion-recognition-with-openai-whisper-large-v3"
+# resolved once; the per-request path only moves the (small) input tensors
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# VOICE_BACKEND=onnx (opt-in, CPU-only hosts): run an exported ONNX model (dynamic int8 when
+# quantization succeeds) through ONNX Runtime. The first such start exports and quantizes the
+# multi-GB model, so it is never done implicitly; the default keeps the PyTorch model, which
+# also stays loaded as the fallback when an ONNX Runtime call fails.
+VOICE_BACKEND = os.environ.get("VOICE_BACKEND", "torch").lower()
+# torch.compile the PyTorch model at startup: VOICE_COMPILE=1 / 0 forces it on / off.
+# Unset, it is on for CUDA only; on CPU the compile takes minutes and gains little over eager.
+VOICE_COMPILE = os.environ.get("VOICE_COMPILE", "1" if DEVICE.type == "cuda" else "0") != "0"
+# async micro-batching (see _batch_loop): every batch size 1..MAX_BATCH is compiled,
+# graph-captured and warmed at startup, so no request waits on a recompile or capture
+BATCH_WINDOW = 0.02
+MAX_BATCH = 4
+AUDIO_ONNX_DIR = "speech_emotion_onnx"        # exported on first CPU start, reused afterwards
+AUDIO_ONNX = os.path.join(AUDIO_ONNX_DIR, "model.onnx")
+AUDIO_ONNX_INT8 = os.path.join(AUDIO_ONNX_DIR, "model.int8.onnx")
+# written when int8 quantization fails, so later starts go straight to the fp32 model
+# instead of retrying it (delete the file to try again)
+AUDIO_ONNX_INT8_FAILED = AUDIO_ONNX_INT8 + ".failed"
 
 # ---- load model + extractor (similar to your flask file) ----
 try:
     logger.info(f"Loading audio model {MODEL_ID} ...")
     model = AutoModelForAudioClassification.from_pretrained(MODEL_ID)
+    if DEVICE.type == "cuda":
+        # Whisper-large is compute-bound on GPU: fp16 halves the bytes and runs on tensor cores
+        model = model.half()
+    model.to(DEVICE).eval()
     feature_extractor = AutoFeatureExtractor.from_pretrained(MODEL_ID, do_normalize=True)
+    # no mask: the extractor pads every clip to the same 30 s window of frames (so batched clips
+    # share one shape), and Whisper's encoder doesn't support masking input_features anyway
+    feature_extractor.return_attention_mask = False
     id2label = model.config.id2label
     logger.info("Audio model loaded")
 except Exception as e:
@@ -37,6 +84,109 @@ except Exception as e:
         6: "surprised"
     }
 
+# label order is fixed once the model (or the fallback table) is loaded
+_ID2LABEL_TUPLE = tuple(id2label[i] for i in range(len(id2label)))
+_EMOTIONS_LIST = tuple(id2label.values())
+
+def _build_audio_ort():
+    """ONNX Runtime session for the CPU path (int8 GEMMs via VNNI/AVX-512 where available)"""
+    if DEVICE.type == "cuda" or VOICE_BACKEND != "onnx" or model is None:
+        return None
+    try:
+        import onnxruntime as ort
+        if not os.path.exists(AUDIO_ONNX):
+            from optimum.onnxruntime import ORTModelForAudioClassification
+            logger.info("Exporting audio model to ONNX (one-time) ...")
+            ORTModelForAudioClassification.from_pretrained(MODEL_ID, export=True).save_pretrained(AUDIO_ONNX_DIR)
+        if not os.path.exists(AUDIO_ONNX_INT8) and not os.path.exists(AUDIO_ONNX_INT8_FAILED):
+            try:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                logger.info("Quantizing audio ONNX model to int8 (one-time) ...")
+                # whisper-large is over protobuf's 2 GB limit: weights live in external data files
+                quantize_dynamic(AUDIO_ONNX, AUDIO_ONNX_INT8, weight_type=QuantType.QInt8,
+                                 use_external_data_format=True)
+            except Exception as e:
+                logger.exception("int8 quantization failed; using the fp32 ONNX model")
+                try:
+                    if os.path.exists(AUDIO_ONNX_INT8):
+                        os.remove(AUDIO_ONNX_INT8)   # partial output would be picked up below
+                    with open(AUDIO_ONNX_INT8_FAILED, "w") as f:
+                        f.write(f"{type(e).__name__}: {e}\n")
+                except OSError:
+                    logger.warning("could not write %s; quantization will be retried next start",
+                                   AUDIO_ONNX_INT8_FAILED)
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(
+            AUDIO_ONNX_INT8 if os.path.exists(AUDIO_ONNX_INT8) else AUDIO_ONNX,
+            sess_options=so, providers=["CPUExecutionProvider"])
+    except Exception:
+        logger.exception("Failed building ONNX Runtime session for audio; using torch")
+        return None
+
+ort_session = _build_audio_ort()
+_ort_input_names = {i.name for i in ort_session.get_inputs()} if ort_session is not None else set()
+
+def _dummy_features(batch=1):
+    """Zero input of the extractor's fixed (batch, n_mels, frames) shape, on DEVICE in the model's dtype"""
+    shape = (batch, feature_extractor.feature_size, feature_extractor.nb_max_frames)
+    return torch.zeros(shape, device=DEVICE, dtype=next(model.parameters()).dtype)
+
+def _compile_model():
+    """torch.compile the torch path (Inductor fuses the LayerNorm/GELU chains around the matmuls);
+    compiled here on dummy clips at every batch size so no request pays for a (re)compile"""
+    global model
+    if model is None or ort_session is not None or not hasattr(torch, "compile") or not VOICE_COMPILE:
+        return
+    eager = model
+    try:
+        model = torch.compile(eager, mode="reduce-overhead", fullgraph=False)
+        # reduce-overhead records one CUDA graph per shape, after a warmup run of that shape
+        runs = 3 if DEVICE.type == "cuda" else 1
+        with torch.inference_mode():
+            for batch in range(1, MAX_BATCH + 1):
+                for _ in range(runs):
+                    model(input_features=_dummy_features(batch))
+    except Exception:
+        logger.exception("torch.compile failed; using the eager audio model")
+        model = eager
+
+_compile_model()
+
+# manually captured CUDA graphs for the eager fp16 model, one per batch size the micro-batcher
+# can produce; a compiled reduce-overhead model already replays CUDA graphs inside Inductor,
+# so no second capture is made on top of it
+_graphs = {}
+_graph_lock = threading.Lock()   # the static buffers (and the shared memory pool) are shared across requests
+
+def _capture_cuda_graph():
+    global _graphs
+    if DEVICE.type != "cuda" or model is None or hasattr(model, "_orig_mod"):
+        return
+    graphs, pool = {}, None
+    try:
+        # largest first: the smaller graphs reuse its memory pool (replays are serialized by the lock)
+        for batch in range(MAX_BATCH, 0, -1):
+            static_in = _dummy_features(batch)
+            # a few eager passes on a side stream first, as torch.cuda.graph requires
+            side = torch.cuda.Stream()
+            side.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side), torch.inference_mode():
+                for _ in range(3):
+                    model(input_features=static_in)
+            torch.cuda.current_stream().wait_stream(side)
+            g = torch.cuda.CUDAGraph()
+            with torch.inference_mode(), torch.cuda.graph(g, pool=pool):
+                static_out = model(input_features=static_in).logits
+            pool = g.pool()
+            graphs[batch] = {"graph": g, "input": static_in, "logits": static_out}
+        _graphs = graphs
+    except Exception:
+        logger.exception("CUDA graph capture failed; running the audio model eagerly")
+        _graphs = {}
+
+_capture_cuda_graph()
+
 EMOTION_RECOMMENDATIONS = {
     'angry': ["Take deep breaths and count to 10", "Go for a short walk to cool down"],
     'disgust': ["Focus on positive aspects", "Practice mindfulness"],
@@ -60,8 +210,18 @@ def _to_wav_bytes_from_webm_or_ogg(raw_bytes: bytes, input_format: str = "webm")
     return buf.getvalue()
 
 def load_audio_with_librosa(path, sr=16000):
-    y, s = librosa.load(path, sr=sr)
-    return y, s
+    if sf is None:
+        import librosa   # needs ffmpeg on system
+        y, s = librosa.load(path, sr=sr)
+        return y, s
+    y, s = sf.read(path, dtype="float32", always_2d=False)
+    if y.ndim > 1:
+        y = y.mean(axis=1)      # downmix like librosa's mono=True
+    if s != sr:
+        # only non-16k recordings pay for the resampler
+        import librosa
+        y = librosa.resample(y, orig_sr=s, target_sr=sr)
+    return y, sr
 
 def preprocess_for_model(audio_path, max_duration=30.0):
     # loads audio using librosa/fallback like your flask code and returns `inputs` for HF extractor
@@ -72,82 +232,186 @@ def preprocess_for_model(audio_path, max_duration=30.0):
         logger.exception("librosa failed to load; re-raising")
         raise
 
-    # truncate/pad
-    max_len = int(16000 * max_duration)
-    if len(y) > max_len:
-        y = y[:max_len]
-    if len(y) < 8000:
-        y = np.pad(y, (0, 8000 - len(y)), 'constant')
-
-    # normalize
-    y = librosa.util.normalize(y)
+    # truncate/pad + peak-normalize in one float32 buffer (same result as np.pad + librosa.util.normalize)
+    n = min(len(y), int(16000 * max_duration))
+    buf = np.zeros(max(n, 8000), dtype=np.float32)
+    buf[:n] = y[:n]
+    if n:
+        peak = np.abs(buf[:n]).max()
+        if peak >= np.finfo(np.float32).tiny:
+            buf[:n] /= peak
+    y = buf
 
     if feature_extractor:
-        inputs = feature_extractor(y, sampling_rate=16000, return_tensors="pt")
+        # numpy out of the extractor, then zero-copy views as tensors
+        inputs = feature_extractor(y, sampling_rate=16000, return_tensors="np")
+        inputs = {k: torch.from_numpy(v) for k, v in inputs.items()}
         return inputs, y
     else:
         return None, y
 
+def _forward(inputs):
+    """Run a (B, n_mels, frames) batch of extractor features; returns (B, n_classes) probabilities"""
+    if ort_session is not None:
+        try:
+            feed = {k: v.numpy() for k, v in inputs.items() if k in _ort_input_names}
+            logits = ort_session.run(None, feed)[0].astype(np.float64)
+            e = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            return e / e.sum(axis=-1, keepdims=True)
+        except Exception:
+            logger.exception("ONNX Runtime audio inference failed; running the torch model instead")
+
+    use_fp16 = DEVICE.type == "cuda"
+    if use_fp16:
+        # page-locked source so the H2D copy is a real async DMA instead of a staged sync copy
+        inputs = {k: v.pin_memory() for k, v in inputs.items()}
+    inputs = {k: v.to(DEVICE, non_blocking=True) for k, v in inputs.items()}
+    if use_fp16:
+        inputs = {k: v.half() if v.is_floating_point() else v for k, v in inputs.items()}
+
+    feats = inputs.get("input_features")
+    graph = _graphs.get(feats.shape[0]) if feats is not None else None
+    if graph is not None and feats.shape == graph["input"].shape:
+        # replay the captured kernels; .float() copies the logits out before the lock is released
+        with _graph_lock:
+            graph["input"].copy_(feats)
+            graph["graph"].replay()
+            logits = graph["logits"].float()
+        return torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
+
+    # inference_mode skips the autograd bookkeeping no_grad still does
+    with torch.inference_mode(), torch.autocast(device_type=DEVICE.type, dtype=torch.float16, enabled=use_fp16):
+        outputs = model(**inputs)
+        logits = outputs.logits.float()   # softmax in fp32
+        return torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
+
+def _result_from_probs(probs, audio_array):
+    pred_id = int(np.argmax(probs))
+    label = id2label[pred_id]
+    confidence = float(probs[pred_id])
+    all_probs = dict(zip(_ID2LABEL_TUPLE, probs.tolist()))
+
+    return {
+        'emotion': label,
+        'confidence': confidence,
+        'confidence_str': f"{confidence:.2%}",
+        'stress_level': EMOTION_TO_STRESS.get(label, 'medium'),
+        'recommendation': random.choice(EMOTION_RECOMMENDATIONS.get(label, [])),
+        'all_probabilities': all_probs,
+        'audio_duration': len(audio_array) / 16000.0
+    }
+
+def _not_loaded_result():
+    # fallback randomized output
+    emotions = _EMOTIONS_LIST
+    emotion = random.choice(emotions)
+    confidence = random.uniform(0.6, 0.95)
+    return {
+        'emotion': emotion,
+        'confidence': confidence,
+        'confidence_str': f"{confidence:.2%}",
+        'stress_level': EMOTION_TO_STRESS.get(emotion, 'medium'),
+        'recommendation': random.choice(EMOTION_RECOMMENDATIONS.get(emotion, [])),
+        'all_probabilities': dict(zip(emotions, np.random.uniform(0.01, 0.2, size=len(emotions)).tolist())),
+        'audio_duration': 5.0,
+        'note': 'fallback mode (model not loaded)'
+    }
+
+def _emergency_result():
+    # fallback emergency behavior like in your Flask app
+    emotions = _EMOTIONS_LIST
+    idx = random.randrange(len(emotions))
+    emotion = emotions[idx]
+    confidence = random.uniform(0.7, 0.9)
+    probs = np.random.uniform(0.01, 0.2, size=len(emotions))
+    probs[idx] = confidence
+    all_probs = dict(zip(emotions, probs.tolist()))
+    return {
+        'emotion': emotion,
+        'confidence': confidence,
+        'confidence_str': f"{confidence:.2%}",
+        'stress_level': EMOTION_TO_STRESS.get(emotion, 'medium'),
+        'recommendation': random.choice(EMOTION_RECOMMENDATIONS.get(emotion, [])),
+        'all_probabilities': all_probs,
+        'audio_duration': 5.0,
+        'note': 'emergency fallback due to error'
+    }
+
 def predict_emotion_from_wav_file(wav_path, max_duration=30.0):
     """Main entry: given path to WAV file, returns same JSON as your Flask predict_emotion"""
     try:
         if model is None:
-            # fallback randomized output
-            emotions = list(id2label.values())
-            emotion = random.choice(emotions)
-            confidence = random.uniform(0.6, 0.95)
-            result = {
-                'emotion': emotion,
-                'confidence': confidence,
-                'confidence_str': f"{confidence:.2%}",
-                'stress_level': EMOTION_TO_STRESS.get(emotion, 'medium'),
-                'recommendation': random.choice(EMOTION_RECOMMENDATIONS.get(emotion, [])),
-                'all_probabilities': {e: random.uniform(0.01, 0.2) for e in emotions},
-                'audio_duration': 5.0,
-                'note': 'fallback mode (model not loaded)'
-            }
-            return result
-
+            return _not_loaded_result()
         inputs, audio_array = preprocess_for_model(wav_path, max_duration=max_duration)
-
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        model.to(device)
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits
-            probs = torch.nn.functional.softmax(logits, dim=-1)[0].cpu().numpy()
-            pred_id = int(np.argmax(probs))
-            label = id2label[pred_id]
-            confidence = float(probs[pred_id])
-            all_probs = {id2label[i]: float(probs[i]) for i in range(len(probs))}
-
-        result = {
-            'emotion': label,
-            'confidence': confidence,
-            'confidence_str': f"{confidence:.2%}",
-            'stress_level': EMOTION_TO_STRESS.get(label, 'medium'),
-            'recommendation': random.choice(EMOTION_RECOMMENDATIONS.get(label, [])),
-            'all_probabilities': all_probs,
-            'audio_duration': len(audio_array) / 16000.0
-        }
-        return result
+        return _result_from_probs(_forward(inputs)[0], audio_array)
     except Exception as e:
         logger.exception("Error during audio prediction")
-        # fallback emergency behavior like in your Flask app
-        emotions = list(id2label.values())
-        emotion = random.choice(emotions)
-        confidence = random.uniform(0.7, 0.9)
-        all_probs = {e: random.uniform(0.01, 0.2) for e in emotions}
-        all_probs[emotion] = confidence
-        return {
-            'emotion': emotion,
-            'confidence': confidence,
-            'confidence_str': f"{confidence:.2%}",
-            'stress_level': EMOTION_TO_STRESS.get(emotion, 'medium'),
-            'recommendation': random.choice(EMOTION_RECOMMENDATIONS.get(emotion, [])),
-            'all_probabilities': all_probs,
-            'audio_duration': 5.0,
-            'note': 'emergency fallback due to error'
-        }
+        return _emergency_result()
+
+def _warmup():
+    """One forward per batch size (1..MAX_BATCH) on silent clips, as the extractor would produce
+    them, through whichever backend is active: cuDNN autotuning (per shape), CUDA/ORT allocations
+    and autocast caches happen here, not on the first user request. Failures are logged and the
+    service starts anyway."""
+    if model is None:
+        return
+    try:
+        for batch in range(1, MAX_BATCH + 1):
+            shape = (batch, feature_extractor.feature_size, feature_extractor.nb_max_frames)
+            _forward({"input_features": torch.from_numpy(np.zeros(shape, dtype=np.float32))})
+    except Exception:
+        logger.exception("Audio model warmup failed")
+
+_warmup()
+
+# ---- micro-batching for the async entry point ----
+# Requests arriving within BATCH_WINDOW of the first queued one share a single forward pass
+# (up to MAX_BATCH clips); the encoder is compute-bound, so B clips cost well under B calls.
+_batcher = {"loop": None, "queue": None, "task": None}
+
+async def _batch_loop(queue):
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            feats = torch.cat([item[0] for item in batch])
+            probs = await asyncio.to_thread(_forward, {"input_features": feats})
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            continue
+        for (_, fut), p in zip(batch, probs):
+            if not fut.done():
+                fut.set_result(p)
+
+def _batch_queue():
+    """Queue + drain task for the running event loop (created on first use)"""
+    loop = asyncio.get_running_loop()
+    if _batcher["loop"] is not loop or _batcher["task"].done():
+        _batcher["loop"] = loop
+        _batcher["queue"] = asyncio.Queue()
+        _batcher["task"] = loop.create_task(_batch_loop(_batcher["queue"]))
+    return _batcher["queue"]
+
+async def predict_emotion_from_wav_file_async(wav_path, max_duration=30.0):
+    """Async variant of predict_emotion_from_wav_file; concurrent calls are batched together"""
+    try:
+        if model is None:
+            return _not_loaded_result()
+        inputs, audio_array = await asyncio.to_thread(preprocess_for_model, wav_path, max_duration)
+        fut = asyncio.get_running_loop().create_future()
+        await _batch_queue().put((inputs["input_features"], fut))
+        return _result_from_probs(await fut, audio_array)
+    except Exception:
+        logger.exception("Error during audio prediction")
+        return _emergency_result()
@@ -19,13 +19,254 @@ Sensor data schema:
 }
 """
 
+import bisect
 import json
 import logging
+import math
+from dataclasses import dataclass
+from itertools import repeat
+from operator import contains, itemgetter
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
+
+try:
+    from numba import njit   # fused single-pass scan over the readings (see _scan_kernel)
+except ImportError:
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# field -> (key, fallback key), the same .get() chains the analyzers always used
+_FIELD_KEYS = {
+    "hr": ("HR", "heartRate"),
+    "rmssd": ("RMSSD", "rmssd"),
+    "lux": ("Lux", "lux"),
+    "temp": ("Temp", "temperature"),
+}
+
+
+@dataclass
+class _SensorArrays:
+    """
+    Struct-of-arrays view of a list of sensor records: one float64 column per field
+    plus boolean motion masks. Built once per request so every analysis is array
+    expressions instead of repeated passes over the list of dicts. Fields an
+    analysis did not ask for are None; records is the original list (timestamps
+    are only read from it when emitting a result).
+    """
+    records: List[Dict[str, Any]]
+    hr: Optional[np.ndarray] = None
+    rmssd: Optional[np.ndarray] = None
+    lux: Optional[np.ndarray] = None
+    temp: Optional[np.ndarray] = None
+    motion_no: Optional[np.ndarray] = None
+    motion_yes: Optional[np.ndarray] = None
+
+
+def _field_values(sensor_data: List[Dict[str, Any]], key: str, alt: str, default) -> list:
+    """
+    record.get(key, record.get(alt, default)) for every record. Logs use one key
+    convention throughout, so the key is picked from the first record and read with
+    a C-level itemgetter; mixed or incomplete records fall back to the .get chain.
+    """
+    first = sensor_data[0]
+    if key in first:
+        picked = key
+    elif alt in first and not any(map(contains, sensor_data, repeat(key))):
+        picked = alt   # only safe when no record carries the preferred key
+    else:
+        picked = None
+    if picked is not None:
+        try:
+            return list(map(itemgetter(picked), sensor_data))
+        except KeyError:
+            pass
+    return [r.get(key, r.get(alt, default)) for r in sensor_data]
+
+
+def _to_soa(sensor_data: List[Dict[str, Any]], fields=tuple(_FIELD_KEYS), motion: bool = True) -> _SensorArrays:
+    """
+    Normalize the (non-empty) records once into a _SensorArrays (only the requested
+    fields are parsed). All columns are filled in a single np.fromiter pass into one
+    structured array; the _SensorArrays fields are views of its columns.
+    """
+    columns = [map(float, _field_values(sensor_data, *_FIELD_KEYS[name], 0)) for name in fields]
+    dtype = [(name, np.float64) for name in fields]
+    if motion:
+        raw = _field_values(sensor_data, "Motion", "motion", "NO")
+        try:
+            # logs repeat a handful of values: upper-case each distinct one once
+            upper = {m: str(m).upper() for m in set(raw)}
+            moves = list(map(upper.__getitem__, raw))
+        except TypeError:   # unhashable motion values
+            moves = [str(m).upper() for m in raw]
+        columns += [map("NO".__eq__, moves), map("YES".__eq__, moves)]
+        dtype += [("motion_no", np.bool_), ("motion_yes", np.bool_)]
+    # align=True keeps every float column 8-byte aligned, which the numba kernels require
+    table = np.fromiter(zip(*columns), dtype=np.dtype(dtype, align=True), count=len(sensor_data))
+    return _SensorArrays(records=sensor_data, **{name: table[name] for name in table.dtype.names})
+
+
+def _seq_sum(x: np.ndarray) -> float:
+    """
+    Left-to-right float64 sum, in the same order as the loops it replaces;
+    np.sum's pairwise order can move the last bit and flip a threshold comparison.
+    """
+    return float(np.cumsum(x)[-1]) if x.size else 0.0
+
+
+def _mean_positive(x: np.ndarray) -> float:
+    """Mean of the entries > 0 (0.0 when there are none), e.g. HR with missing readings."""
+    pos = x[x > 0]
+    return _seq_sum(pos) / max(1, pos.size)
+
+
+def _runs(mask: np.ndarray, min_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run-length encode a boolean mask: (starts, ends) of every run of True values
+    at least min_len long, as half-open [start, end) index pairs.
+    """
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_len
+    return starts[keep], ends[keep]
+
+
+def _period_stats(arr: _SensorArrays, start: int, end: int) -> Dict[str, float]:
+    """
+    Light/HRV statistics of the readings in [start, end).
+    Works on slices (views, no copies), so each statistic is one C pass over just
+    the period rather than over the whole history.
+    """
+    n = end - start
+    return {
+        "avg_lux": _seq_sum(arr.lux[start:end]) / n,
+        "avg_rmssd": _mean_positive(arr.rmssd[start:end]),
+    }
+
+
+def _sleep_mask(arr: _SensorArrays, avg_hr: float) -> np.ndarray:
+    """Still, dark, and relaxed HR (or no HR reading)."""
+    hr = arr.hr
+    return arr.motion_no & (arr.lux < 10) & ((hr < avg_hr * 0.85) | (hr == 0))
+
+
+# Explicit signatures compile the kernels eagerly at import (and cache=True reuses the
+# native code across restarts), so the first request never pays the JIT compile.
+_SCAN_SIG = "Tuple((i4[::1], i4[::1], i4[::1], i4[::1], b1))(f8[:], f8[:], b1[:], f8)"
+_STATS_SIG = "Tuple((i8, f8, f8))(f8[:])"
+
+# The *_loop functions are written in the numba subset and compiled below when numba is
+# installed; without it, _scan / _positive_stats use numpy expressions instead.
+def _scan_loop(hr, lux, motion_no, avg_hr):
+    """
+    One pass over the readings running both state machines at once: sleep runs
+    (>= 3 readings) and awake-sedentary runs (>= 5), written into preallocated
+    index buffers. Same criteria as _sleep_mask and the sedentary mask, without
+    the temporary masks/diff arrays. Returns (sleep_starts, sleep_ends,
+    sed_starts, sed_ends, last_reading_sleeping).
+    """
+    n = hr.shape[0]
+    sleep_starts = np.empty(n, dtype=np.int32)
+    sleep_ends = np.empty(n, dtype=np.int32)
+    sed_starts = np.empty(n, dtype=np.int32)
+    sed_ends = np.empty(n, dtype=np.int32)
+    hr_limit = avg_hr * 0.85
+    n_sleep = 0
+    n_sed = 0
+    sleep_run = -1
+    sed_run = -1
+    sleeping = False
+    for i in range(n):
+        sleeping = motion_no[i] and lux[i] < 10 and (hr[i] < hr_limit or hr[i] == 0)
+        sedentary = motion_no[i] and lux[i] >= 10 and not sleeping
+        if sleeping:
+            if sleep_run < 0:
+                sleep_run = i
+        elif sleep_run >= 0:
+            if i - sleep_run >= 3:
+                sleep_starts[n_sleep] = sleep_run
+                sleep_ends[n_sleep] = i
+                n_sleep += 1
+            sleep_run = -1
+        if sedentary:
+            if sed_run < 0:
+                sed_run = i
+        elif sed_run >= 0:
+            if i - sed_run >= 5:
+                sed_starts[n_sed] = sed_run
+                sed_ends[n_sed] = i
+                n_sed += 1
+            sed_run = -1
+    # runs still open at the last reading
+    if sleep_run >= 0 and n - sleep_run >= 3:
+        sleep_starts[n_sleep] = sleep_run
+        sleep_ends[n_sleep] = n
+        n_sleep += 1
+    if sed_run >= 0 and n - sed_run >= 5:
+        sed_starts[n_sed] = sed_run
+        sed_ends[n_sed] = n
+        n_sed += 1
+    return sleep_starts[:n_sleep], sleep_ends[:n_sleep], sed_starts[:n_sed], sed_ends[:n_sed], sleeping
+
+
+_scan_kernel = njit(_SCAN_SIG, cache=True)(_scan_loop) if njit is not None else None
+
+
+def _positive_stats_loop(x):
+    """Count, mean and population variance of the entries > 0, without temporaries."""
+    n = 0
+    total = 0.0
+    for v in x:
+        if v > 0:
+            total += v
+            n += 1
+    if n == 0:
+        return 0, 0.0, 0.0
+    mean = total / n
+    sq = 0.0
+    for v in x:
+        if v > 0:
+            d = v - mean
+            sq += d * d
+    return n, mean, sq / n
+
+
+_positive_stats_kernel = njit(_STATS_SIG, cache=True)(_positive_stats_loop) if njit is not None else None
+
+
+def _positive_stats(x: np.ndarray) -> Tuple[int, float, float]:
+    """
+    (count, mean, population variance) of the entries > 0. Two passes in the
+    original summation order rather than np.std's pairwise/Welford arithmetic,
+    so avg_hr and the HR std come out bit-identical to before.
+    """
+    if _positive_stats_kernel is not None:
+        n, mean, var = _positive_stats_kernel(x)
+        return int(n), float(mean), float(var)
+    pos = x[x > 0]
+    if not pos.size:
+        return 0, 0.0, 0.0
+    mean = _seq_sum(pos) / pos.size
+    return int(pos.size), mean, _seq_sum((pos - mean) ** 2) / pos.size
+
+
+def _scan(arr: _SensorArrays, avg_hr: float):
+    """
+    Sleep and sedentary runs of non-empty readings:
+    (sleep_starts, sleep_ends, sed_starts, sed_ends, last_reading_sleeping).
+    Uses the numba kernel when available, otherwise the equivalent numpy masks.
+    """
+    if _scan_kernel is not None:
+        return _scan_kernel(arr.hr, arr.lux, arr.motion_no, avg_hr)
+    sleep_mask = _sleep_mask(arr, avg_hr)
+    # Awake and sedentary: no motion but adequate light (sleep readings never count)
+    sedentary_mask = arr.motion_no & (arr.lux >= 10) & ~sleep_mask
+    return _runs(sleep_mask, 3) + _runs(sedentary_mask, 5) + (bool(sleep_mask[-1]),)
+
 
 def _parse_timestamp(ts_str: str) -> Optional[datetime]:
     """Parse timestamp string to datetime object."""
@@ -46,6 +287,7 @@ def _get_current_time() -> datetime:
     return datetime.now()
 
 
+
 def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Detect sleep periods and calculate sleep score.
@@ -66,7 +308,8 @@ def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
             "total_duration_hours": float,
             "sleep_score": float (0-100),
             "sleep_quality": str ("Good" / "OK" / "Poor"),
-            "quality_factors": dict
+            "quality_factors": dict (duration / consistency / environment / hrv_recovery scores;
+                                     consistency is 100 for any detected period)
         }
     """
     if not sensor_data:
@@ -77,57 +320,19 @@ def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
     
     # Normalize field names
-    normalized_data = []
-    for record in sensor_data:
-        normalized = {
-            "hr": float(record.get("HR", record.get("heartRate", 0))),
-            "rmssd": float(record.get("RMSSD", record.get("rmssd", 0))),
-            "lux": float(record.get("Lux", record.get("lux", 0))),
-            "temp": float(record.get("Temp", record.get("temperature", 0))),
-            "motion": str(record.get("Motion", record.get("motion", "NO"))).upper(),
-            "timestamp": record.get("timestamp", "")
-        }
-        normalized_data.append(normalized)
+    arr = _to_soa(sensor_data)
     
     # Calculate average HR for baseline
-    avg_hr = sum(d["hr"] for d in normalized_data if d["hr"] > 0) / max(1, sum(1 for d in normalized_data if d["hr"] > 0))
-    
-    # Detect sleep periods (consecutive readings meeting sleep criteria)
-    sleep_periods = []
-    current_sleep_start = None
-    current_sleep_records = []
-    
-    for i, record in enumerate(normalized_data):
-        is_sleeping = (
-            record["motion"] == "NO" and
-            record["lux"] < 10 and
-            (record["hr"] < avg_hr * 0.85 or record["hr"] == 0)  # Relaxed HR or no reading
-        )
-        
-        if is_sleeping:
-            if current_sleep_start is None:
-                current_sleep_start = i
-            current_sleep_records.append(record)
-        else:
-            # End of sleep period
-            if current_sleep_start is not None and len(current_sleep_records) >= 3:
-                sleep_periods.append({
-                    "start_idx": current_sleep_start,
-                    "end_idx": i - 1,
-                    "records": current_sleep_records
-                })
-            current_sleep_start = None
-            current_sleep_records = []
-    
-    # Handle ongoing sleep period
-    if current_sleep_start is not None and len(current_sleep_records) >= 3:
-        sleep_periods.append({
-            "start_idx": current_sleep_start,
-            "end_idx": len(normalized_data) - 1,
-            "records": current_sleep_records
-        })
-    
-    if not sleep_periods:
+    avg_hr = _mean_positive(arr.hr)
+    return _analyze_sleep_soa(arr, _scan(arr, avg_hr))
+
+
+def _analyze_sleep_soa(arr: _SensorArrays, scan) -> Dict[str, Any]:
+    """analyze_sleep on prebuilt arrays and their _scan result (non-empty data)."""
+    # Sleep periods: at least 3 consecutive readings meeting sleep criteria
+    sleep_starts, sleep_ends = scan[0], scan[1]
+    
+    if not sleep_starts.size:
         return {
             "sleep_detected": False,
             "sleep_start": None,
@@ -140,9 +345,11 @@ def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
             }
         }
     
-    # Use the longest sleep period
-    longest_period = max(sleep_periods, key=lambda p: len(p["records"]))
-    sleep_duration_hours = len(longest_period["records"]) / 60.0  # Assuming 1 reading per minute
+    # Use the longest sleep period (the first one on ties)
+    longest = int(np.argmax(sleep_ends - sleep_starts))
+    start, end = int(sleep_starts[longest]), int(sleep_ends[longest])
+    period_len = end - start
+    sleep_duration_hours = period_len / 60.0  # Assuming 1 reading per minute
     
     # Calculate sleep score (0-100)
     score = 50.0  # Base score
@@ -160,13 +367,15 @@ def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     quality_factors["duration_score"] = round(duration_score, 1)
     
-    # Consistency scoring (low motion throughout)
-    motion_consistency = sum(1 for r in longest_period["records"] if r["motion"] == "NO") / len(longest_period["records"])
-    consistency_score = motion_consistency * 100
+    stats = _period_stats(arr, start, end)
+    
+    # Consistency scoring (low motion throughout): every reading of a sleep
+    # period has motion "NO" by definition, so the still fraction is always 1
+    consistency_score = 100.0
     quality_factors["consistency_score"] = round(consistency_score, 1)
     
     # Environment scoring (darkness)
-    avg_lux = sum(r["lux"] for r in longest_period["records"]) / len(longest_period["records"])
+    avg_lux = stats["avg_lux"]
     if avg_lux < 5:
         env_score = 100
     elif avg_lux < 20:
@@ -176,7 +385,7 @@ def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     quality_factors["environment_score"] = round(env_score, 1)
     
     # HRV scoring (higher RMSSD = better recovery)
-    avg_rmssd = sum(r["rmssd"] for r in longest_period["records"] if r["rmssd"] > 0) / max(1, sum(1 for r in longest_period["records"] if r["rmssd"] > 0))
+    avg_rmssd = stats["avg_rmssd"]
     if avg_rmssd > 40:
         hrv_score = 100
     elif avg_rmssd > 20:
@@ -202,8 +411,8 @@ def analyze_sleep(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         quality = "Poor"
     
     # Get timestamps if available
-    sleep_start_ts = longest_period["records"][0].get("timestamp", "Unknown")
-    sleep_end_ts = longest_period["records"][-1].get("timestamp", "Unknown")
+    sleep_start_ts = arr.records[start].get("timestamp", "")
+    sleep_end_ts = arr.records[end - 1].get("timestamp", "")
     
     return {
         "sleep_detected": True,
@@ -241,95 +450,34 @@ def detect_sedentary(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
     
     # Normalize data
-    normalized_data = []
-    for record in sensor_data:
-        normalized = {
-            "hr": float(record.get("HR", record.get("heartRate", 0))),
-            "lux": float(record.get("Lux", record.get("lux", 0))),
-            "motion": str(record.get("Motion", record.get("motion", "NO"))).upper(),
-            "timestamp": record.get("timestamp", "")
-        }
-        normalized_data.append(normalized)
-    
-    # First, identify sleep periods (to exclude them)
-    avg_hr = sum(d["hr"] for d in normalized_data if d["hr"] > 0) / max(1, sum(1 for d in normalized_data if d["hr"] > 0))
-    
-    sleep_indices = set()
-    for i, record in enumerate(normalized_data):
-        is_sleeping = (
-            record["motion"] == "NO" and
-            record["lux"] < 10 and
-            (record["hr"] < avg_hr * 0.85 or record["hr"] == 0)
-        )
-        if is_sleeping:
-            sleep_indices.add(i)
-    
-    # Detect sedentary periods (awake but no motion)
-    sedentary_periods = []
-    current_sedentary_start = None
-    current_sedentary_count = 0
-    
-    for i, record in enumerate(normalized_data):
-        if i in sleep_indices:
-            # Skip sleep periods
-            if current_sedentary_start is not None and current_sedentary_count >= 5:
-                sedentary_periods.append({
-                    "start_idx": current_sedentary_start,
-                    "end_idx": i - 1,
-                    "duration_minutes": current_sedentary_count
-                })
-            current_sedentary_start = None
-            current_sedentary_count = 0
-            continue
-        
-        # Awake and sedentary: no motion but adequate light
-        is_sedentary = (record["motion"] == "NO" and record["lux"] >= 10)
-        
-        if is_sedentary:
-            if current_sedentary_start is None:
-                current_sedentary_start = i
-            current_sedentary_count += 1
-        else:
-            # Active period
-            if current_sedentary_start is not None and current_sedentary_count >= 5:
-                sedentary_periods.append({
-                    "start_idx": current_sedentary_start,
-                    "end_idx": i - 1,
-                    "duration_minutes": current_sedentary_count
-                })
-            current_sedentary_start = None
-            current_sedentary_count = 0
-    
-    # Handle ongoing sedentary period
-    if current_sedentary_start is not None and current_sedentary_count >= 5:
-        sedentary_periods.append({
-            "start_idx": current_sedentary_start,
-            "end_idx": len(normalized_data) - 1,
-            "duration_minutes": current_sedentary_count
-        })
-    
-    total_sedentary_minutes = sum(p["duration_minutes"] for p in sedentary_periods)
-    longest_period = max((p["duration_minutes"] for p in sedentary_periods), default=0)
+    arr = _to_soa(sensor_data, ("hr", "lux"))
+    
+    # Identify sleep (to exclude it) and sedentary periods in one scan
+    return _detect_sedentary_soa(arr, _scan(arr, _mean_positive(arr.hr)))
+
+
+def _detect_sedentary_soa(arr: _SensorArrays, scan) -> Dict[str, Any]:
+    """detect_sedentary on prebuilt arrays and their _scan result (non-empty data)."""
+    # Sedentary periods: awake but no motion, at least 5 consecutive readings
+    _, _, sed_starts, sed_ends, last_sleeping = scan
+    durations = sed_ends - sed_starts   # one reading per minute
+    
+    total_sedentary_minutes = int(durations.sum())
+    longest_period = int(durations.max()) if durations.size else 0
     
     # Determine current status
-    if normalized_data:
-        last_record = normalized_data[-1]
-        last_idx = len(normalized_data) - 1
-        
-        if last_idx in sleep_indices:
-            status = "sleeping"
-        elif last_record["motion"] == "YES":
-            status = "active"
-        else:
-            status = "sedentary"
+    if last_sleeping:
+        status = "sleeping"
+    elif arr.motion_yes[-1]:
+        status = "active"
     else:
-        status = "unknown"
+        status = "sedentary"
     
     return {
         "sedentary_duration_minutes": round(total_sedentary_minutes, 1),
         "sedentary_status": status,
         "longest_sedentary_period_minutes": round(longest_period, 1),
-        "sedentary_periods_count": len(sedentary_periods),
+        "sedentary_periods_count": int(durations.size),
         "recommendation": "Take a 5-minute break every hour" if total_sedentary_minutes > 60 else "Good activity level",
         "current_time": _get_current_time().strftime("%Y-%m-%d %H:%M:%S")
     }
@@ -360,26 +508,21 @@ def score_hrv(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
     
     # Normalize data
-    hr_values = []
-    rmssd_values = []
-    
-    for record in sensor_data:
-        hr = float(record.get("HR", record.get("heartRate", 0)))
-        rmssd = float(record.get("RMSSD", record.get("rmssd", 0)))
-        
-        if hr > 0:
-            hr_values.append(hr)
-        if rmssd > 0:
-            rmssd_values.append(rmssd)
+    return _score_hrv_soa(_to_soa(sensor_data, ("hr", "rmssd"), motion=False))
+
+
+def _score_hrv_soa(arr: _SensorArrays) -> Dict[str, Any]:
+    """score_hrv on prebuilt arrays (non-empty data)."""
+    # only positive readings count
+    hr_count, avg_hr, hr_variance = _positive_stats(arr.hr)
     
-    if not hr_values:
+    if not hr_count:
         return {
             "error": "No valid heart rate data",
             "stress_level": "unknown"
         }
     
-    avg_hr = sum(hr_values) / len(hr_values)
-    avg_rmssd = sum(rmssd_values) / len(rmssd_values) if rmssd_values else 0
+    avg_rmssd = _mean_positive(arr.rmssd)
     
     # HRV Score calculation
     # RMSSD ranges: <20 = poor, 20-40 = moderate, 40-60 = good, >60 = excellent
@@ -408,8 +551,7 @@ def score_hrv(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
             stress_level = "high"
     
     # Heart rate variability (calculate standard deviation)
-    if len(hr_values) > 1:
-        hr_variance = sum((x - avg_hr) ** 2 for x in hr_values) / len(hr_values)
+    if hr_count > 1:
         hr_std = hr_variance ** 0.5
         
         # Higher variability in HR can indicate stress
@@ -444,12 +586,20 @@ def score_hrv(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         "stress_level": stress_level,
         "avg_heart_rate": round(avg_hr, 1),
         "avg_rmssd": round(avg_rmssd, 1) if avg_rmssd > 0 else None,
-        "heart_rate_variability_std": round(hr_std, 1) if len(hr_values) > 1 else 0,
+        "heart_rate_variability_std": round(hr_std, 1) if hr_count > 1 else 0,
         "recommendations": recommendations,
         "current_time": _get_current_time().strftime("%Y-%m-%d %H:%M:%S")
     }
 
 
+# Environment bands: bisect_right over the edges indexes the score. Each edge is the first
+# value of the next band; nextafter keeps 500 / 1000 lux and 24 / 26 °C in the lower band.
+_LIGHT_EDGES = (100.0, 200.0, math.nextafter(500.0, math.inf), math.nextafter(1000.0, math.inf))
+_LIGHT_SCORES = (70, 40, 10, 40, 70)   # prefer 200-500 lux for work
+_TEMP_EDGES = (18.0, 20.0, math.nextafter(24.0, math.inf), math.nextafter(26.0, math.inf))
+_TEMP_SCORES = (70, 40, 10, 40, 70)    # prefer 20-24°C
+
+
 def compute_burnout(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Compute comprehensive burnout index.
@@ -477,10 +627,12 @@ def compute_burnout(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
             "burnout_level": "unknown"
         }
     
-    # Get component analyses
-    sleep_analysis = analyze_sleep(sensor_data)
-    sedentary_analysis = detect_sedentary(sensor_data)
-    hrv_analysis = score_hrv(sensor_data)
+    # Get component analyses: normalize once, and share the sleep/sedentary scan
+    arr = _to_soa(sensor_data)
+    scan = _scan(arr, _mean_positive(arr.hr))
+    sleep_analysis = _analyze_sleep_soa(arr, scan)
+    sedentary_analysis = _detect_sedentary_soa(arr, scan)
+    hrv_analysis = _score_hrv_soa(arr)
     
     # Calculate component scores (convert to burnout scale where higher = worse)
     
@@ -505,32 +657,14 @@ def compute_burnout(sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     hrv_score = hrv_analysis.get("hrv_score", 50)
     stress_burnout = 100 - hrv_score
     
-    # Environment component (15%): based on temp and light
-    normalized_data = []
-    for record in sensor_data:
-        normalized_data.append({
-            "lux": float(record.get("Lux", record.get("lux", 0))),
-            "temp": float(record.get("Temp", record.get("temperature", 0)))
-        })
-    
-    avg_lux = sum(d["lux"] for d in normalized_data) / len(normalized_data)
-    avg_temp = sum(d["temp"] for d in normalized_data) / len(normalized_data)
-    
-    # Light scoring (prefer 200-500 lux for work)
-    if 200 <= avg_lux <= 500:
-        light_burnout = 10
-    elif 100 <= avg_lux < 200 or 500 < avg_lux <= 1000:
-        light_burnout = 40
-    else:
-        light_burnout = 70
+    # Environment component (15%): based on temp and light, from the shared arrays
+    n = arr.lux.size   # > 0: empty input returned early
+    avg_lux = _seq_sum(arr.lux) / n
+    avg_temp = _seq_sum(arr.temp) / n
     
-    # Temperature scoring (prefer 20-24°C)
-    if 20 <= avg_temp <= 24:
-        temp_burnout = 10
-    elif 18 <= avg_temp < 20 or 24 < avg_temp <= 26:
-        temp_burnout = 40
-    else:
-        temp_burnout = 70
+    # Light and temperature scoring (NaN sorts past the last edge, i.e. the worst band)
+    light_burnout = _LIGHT_SCORES[bisect.bisect_right(_LIGHT_EDGES, avg_lux)]
+    temp_burnout = _TEMP_SCORES[bisect.bisect_right(_TEMP_EDGES, avg_temp)]
     
     env_burnout = (light_burnout + temp_burnout) / 2
     
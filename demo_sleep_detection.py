@@ -13,16 +13,32 @@ import json
 import time
 from app.wellness_engine import analyze_sleep
 
+try:
+    import orjson   # faster parse of the demo data when installed
+except ImportError:
+    orjson = None
+
+BANNER = "=" * 60
+
+# (no motion, lux band: <10 / <100 / brighter, HR < 65) -> (label, ANSI color); anything else is awake
+_AWAKE = ("👁️  AWAKE", "\033[92m")  # Green
+_STATES = {
+    (True, 0, True): ("😴 SLEEPING", "\033[94m"),   # Blue
+    (True, 0, False): ("😌 RELAXING", "\033[93m"),  # Yellow
+    (True, 1, True): ("😌 RELAXING", "\033[93m"),
+    (True, 1, False): ("😌 RELAXING", "\033[93m"),
+}
+
 def load_demo_data():
     """Load the demo sleep data."""
-    with open('demo_sleep_data.json', 'r') as f:
-        return json.load(f)
+    with open('demo_sleep_data.json', 'rb') as f:
+        return orjson.loads(f.read()) if orjson is not None else json.load(f)
 
 def display_sensor_reading(reading, index, total):
     """Display a single sensor reading in a nice format."""
-    print(f"\n{'='*60}")
+    print(f"\n{BANNER}")
     print(f"Reading {index + 1}/{total} - {reading.get('timestamp', 'N/A')}")
-    print(f"{'='*60}")
+    print(f"{BANNER}")
     print(f"💓 Heart Rate: {reading['heartRate']} bpm")
     print(f"📊 HRV (RMSSD): {reading['rmssd']} ms")
     print(f"💡 Light Level: {reading['lux']} lux")
@@ -30,24 +46,18 @@ def display_sensor_reading(reading, index, total):
     print(f"🏃 Motion: {'YES' if reading['motion'] == 1 else 'NO'}")
     
     # Determine current state
-    if reading['motion'] == 0 and reading['lux'] < 10 and reading['heartRate'] < 65:
-        state = "😴 SLEEPING"
-        color = "\033[94m"  # Blue
-    elif reading['motion'] == 0 and reading['lux'] < 100:
-        state = "😌 RELAXING"
-        color = "\033[93m"  # Yellow
-    else:
-        state = "👁️  AWAKE"
-        color = "\033[92m"  # Green
+    lux = reading['lux']
+    lux_band = 0 if lux < 10 else 1 if lux < 100 else 2
+    state, color = _STATES.get((reading['motion'] == 0, lux_band, reading['heartRate'] < 65), _AWAKE)
     
     print(f"\n{color}Current State: {state}\033[0m")
-    print(f"{'='*60}")
+    print(f"{BANNER}")
 
 def run_live_demo():
     """Run a live demonstration showing sensor readings over time."""
-    print("\n" + "="*60)
+    print("\n" + BANNER)
     print("🛌 SLEEP DETECTION DEMO - Live Simulation")
-    print("="*60)
+    print(BANNER)
     print("\nThis demo simulates a full sleep cycle from evening to morning.")
     print("Watch how the sensor values change and sleep is detected!\n")
     
@@ -64,9 +74,9 @@ def run_live_demo():
             time.sleep(2)
     
     # Now analyze the complete sleep data
-    print("\n\n" + "="*60)
+    print("\n\n" + BANNER)
     print("📊 COMPLETE SLEEP ANALYSIS")
-    print("="*60)
+    print(BANNER)
     
     analysis = analyze_sleep(demo_data)
     
@@ -85,21 +95,21 @@ def run_live_demo():
         print(f"  - Environment Score: {factors.get('environment_score', 0)}/100")
         print(f"  - HRV Recovery Score: {factors.get('hrv_recovery_score', 0)}/100")
     
-    print("\n" + "="*60)
+    print("\n" + BANNER)
     print("✨ Demo Complete!")
-    print("="*60 + "\n")
+    print(BANNER + "\n")
 
 def run_quick_demo():
     """Quick demo showing just the analysis results."""
-    print("\n" + "="*60)
+    print("\n" + BANNER)
     print("🛌 SLEEP DETECTION DEMO - Quick Analysis")
-    print("="*60)
+    print(BANNER)
     
     demo_data = load_demo_data()
     analysis = analyze_sleep(demo_data)
     
     print(json.dumps(analysis, indent=2))
-    print("\n" + "="*60 + "\n")
+    print("\n" + BANNER + "\n")
 
 if __name__ == "__main__":
     import sys
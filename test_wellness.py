@@ -2,47 +2,66 @@
 Demo script to test wellness engine functionality
 """
 import json
+from app.sensors import load_all_sensor_data, compute_wellness_from_sensors, compute_wellness_arr
 from app.wellness_engine import analyze_sleep, detect_sedentary, score_hrv, compute_burnout
 
-# Load sensor data
-with open("sensor_data.json", "r") as f:
-    sensor_data = json.load(f)
+BANNER = "=" * 60
 
-print("=" * 60)
+# Load sensor data (JSON array or the JSON-lines log getData.py appends; orjson when installed)
+sensor_data = load_all_sensor_data()
+
+print(BANNER)
 print("WELLNESS ENGINE DEMONSTRATION")
-print("=" * 60)
+print(BANNER)
 print(f"\nLoaded {len(sensor_data)} sensor record(s)\n")
 
 # Test 1: Sleep Analysis
-print("\n" + "=" * 60)
+print("\n" + BANNER)
 print("1. SLEEP ANALYSIS")
-print("=" * 60)
+print(BANNER)
 sleep_result = analyze_sleep(sensor_data)
 print(json.dumps(sleep_result, indent=2))
 
 # Test 2: Sedentary Detection
-print("\n" + "=" * 60)
+print("\n" + BANNER)
 print("2. SEDENTARY BEHAVIOR DETECTION")
-print("=" * 60)
+print(BANNER)
 sedentary_result = detect_sedentary(sensor_data)
 print(json.dumps(sedentary_result, indent=2))
 
 # Test 3: HRV/Stress Scoring
-print("\n" + "=" * 60)
+print("\n" + BANNER)
 print("3. HRV & STRESS ANALYSIS")
-print("=" * 60)
+print(BANNER)
 hrv_result = score_hrv(sensor_data)
 print(json.dumps(hrv_result, indent=2))
 
 # Test 4: Burnout Index
-print("\n" + "=" * 60)
+print("\n" + BANNER)
 print("4. COMPREHENSIVE BURNOUT INDEX")
-print("=" * 60)
+print(BANNER)
 burnout_result = compute_burnout(sensor_data)
 # Print without component_analyses for brevity
 burnout_summary = {k: v for k, v in burnout_result.items() if k != "component_analyses"}
 print(json.dumps(burnout_summary, indent=2))
 
-print("\n" + "=" * 60)
+# Test 5: vectorized wellness agrees with the per-reading score (incl. missing/NaN readings)
+print("\n" + BANNER)
+print("5. WELLNESS INDEX: ARRAY vs SCALAR")
+print(BANNER)
+nan = float("nan")
+readings = [(r.get("heartRate", r.get("HR", 0)), r.get("tempC", r.get("Temp", 0)), r.get("lux", r.get("Lux", 0)))
+            for r in sensor_data]
+readings += [(nan, 22, 300), (72, nan, 300), (72, 22, nan), (nan, nan, nan), (0, 0, 0), (130, 31, 1500)]
+batch = compute_wellness_arr(*zip(*readings))
+for i, (hr, temp, lux) in enumerate(readings):
+    single = compute_wellness_from_sensors(hr, temp, lux)
+    assert single["score"] == batch["score"][i], (hr, temp, lux)
+    assert single["status"] == batch["status"][i], (hr, temp, lux)
+    for key, value in single["breakdown"].items():
+        assert value == batch["breakdown"][key][i], (key, hr, temp, lux)
+print(f"{len(readings)} readings: array and scalar scores match")
+
+print("\n" + BANNER)
 print("DEMONSTRATION COMPLETE")
-print("=" * 60)
+print(BANNER)